@@ -1,15 +1,52 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 import sqlite3
-import pandas as pd
 import json
 from datetime import datetime
 import openai
-from typing import Dict, List, Any
+import anthropic
+import tiktoken
+from typing import Dict, List, Any, Iterator, Optional
 import re
+import random
 import traceback
+import hashlib
+import functools
+import threading
+import atexit
+import time
+import queue
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+import numpy as np
+import sqlglot
+from sqlglot import exp
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:
+    ort = None
+    Tokenizer = None
+
+try:
+    from llama_cpp import Llama
+except ImportError:
+    Llama = None
+
+# RE2 compiles patterns to automata that match in linear time, so crafted SQL can't trigger backtracking blowups
+try:
+    import re2 as sql_re
+except ImportError:
+    sql_re = re
 
 # Load environment variables
 load_dotenv()
@@ -18,177 +55,1036 @@ app = Flask(__name__)
 CORS(app)
 
 # Configuration
-openai.api_key = os.getenv('OPENAI_API_KEY')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY')) if os.getenv('OPENAI_API_KEY') else None
+ANTHROPIC_MODEL = os.getenv('ANTHROPIC_MODEL', 'claude-3-5-haiku-20241022')
+anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY')) if os.getenv('ANTHROPIC_API_KEY') else None
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'business_data.db')
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'llm_cache.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+SUMMARY_SAMPLE_SIZE = 10_000
+EXACT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'llm_exact_cache.json')
+EXACT_CACHE_SIZE = 4096
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_MAX_ROWS = 10_000
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+EMBEDDING_ONNX_PATH = os.getenv(
+    'EMBEDDING_ONNX_PATH', os.path.join(os.path.dirname(__file__), 'onnx_model', 'model_quantized.onnx')
+)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92'))
+DRAFT_MODEL_PATH = os.getenv('DRAFT_MODEL_PATH')
+DRAFT_MODEL_CONTEXT = 4096
+DRAFT_MAX_TOKENS = 256
+BATCH_MAX_PROMPT_TOKENS = 8000
+MAX_BATCH_QUESTIONS = 16
+INSIGHTS_MAX_TOKENS = 800
+# Lowest completion limit among the providers, i.e. the Anthropic fallback model
+MAX_OUTPUT_TOKENS = 8192
+
+try:
+    token_encoding = tiktoken.encoding_for_model(OPENAI_MODEL)
+except Exception as e:
+    print(f"Error loading tokenizer for {OPENAI_MODEL}, estimating token counts: {e}")
+    token_encoding = None
+
+def count_tokens(text: str) -> int:
+    """Count prompt tokens for the hosted model, or estimate them if its tokenizer is unavailable"""
+    if token_encoding is None:
+        return len(text) // 4 + 1
+    return len(token_encoding.encode(text))
+
+# Markdown code fences that providers without a JSON mode may wrap around their answers
+_JSON_FENCE_RE = sql_re.compile(r'(?i)^```(?:json)?\s*|\s*```$')
+
+# Quoted literals, quoted identifiers and comments are matched first so whitespace and keywords
+# inside them are left alone; a line comment keeps its newline, which ends the comment
+_SQL_NORMALIZE_RE = sql_re.compile(
+    r"(?is)('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`(?:[^`]|``)*`|\[[^\]]*\]|--[^\n]*\n?|/\*.*?\*/)"
+    r"|(\s+)"
+    r"|\b(select|from|where|join|inner|left|right|outer|cross|on|using|group|order|by|having|limit|offset"
+    r"|as|and|or|not|in|is|null|like|between|distinct|union|all|case|when|then|else|end|asc|desc|with)\b"
+)
+
+# Statements that modify the database, checked after any leading comments are skipped
+_LEADING_COMMENTS_RE = sql_re.compile(r'(?s)^(?:\s|--[^\n]*|/\*.*?\*/)*')
+_WRITE_RE = sql_re.compile(
+    r'(?i)^\s*(insert|update|delete|drop|alter|create|replace|attach|detach|pragma|vacuum|reindex)\b'
+)
+
+def check_read_only_sql(sql_query: str) -> Optional[str]:
+    """Return an error message unless the SQL is a single, well-formed read-only query"""
+    if _WRITE_RE.match(_LEADING_COMMENTS_RE.sub('', sql_query, count=1)):
+        return "Only read-only queries are allowed"
+    try:
+        statements = [s for s in sqlglot.parse(sql_query, read='sqlite') if s is not None]
+    except sqlglot.errors.SqlglotError as e:
+        # TokenError (e.g. an unterminated quote) has no structured errors, unlike ParseError
+        errors = getattr(e, 'errors', None)
+        return f"Invalid SQL: {errors[0]['description'] if errors else e}"
+    if len(statements) != 1:
+        return "Only a single SQL statement is allowed"
+    if not isinstance(statements[0], exp.Query):
+        return "Only read-only queries are allowed"
+    return None
+
+def normalize_sql(sql_query: str) -> str:
+    """Collapse whitespace and lowercase keywords so equivalent queries share a cache key"""
+    def replace(match):
+        if match.group(1):
+            return match.group(1)
+        if match.group(2):
+            return ' '
+        return match.group(3).lower()
+    return _SQL_NORMALIZE_RE.sub(replace, sql_query).strip().rstrip(';').strip()
+
+# Static instructions go first so the schema block forms a stable, cacheable prompt prefix
+SQL_SYSTEM_PROMPT = """You are an expert SQL analyst. Given the database schema below and a business question,
+generate an appropriate SQLite query.
+
+Important guidelines:
+1. Handle cases where column names might be unclear or abbreviated
+2. Use appropriate JOINs when data spans multiple tables
+3. Apply proper filtering and aggregation
+4. Consider data quality issues (nulls, duplicates, inconsistent formats)
+5. Respond with a JSON object of the form {"sql": "<query>"} and no explanations
+
+Database Schema:
+"""
+
+BATCH_SQL_INSTRUCTIONS = """
+The user message is a JSON array of questions, each with an "id". Instead of a single query, respond with a
+JSON object of the form {"queries": [{"id": <id>, "sql": "<query>"}]} containing exactly one SQLite query per question.
+"""
+
+# Prompt for the local draft model; the schema is inserted between prefix and suffix
+DRAFT_PROMPT_PREFIX = """### Task
+Generate a SQLite query to answer the question at the end, using only the schema below.
+
+### Database Schema
+"""
+
+DRAFT_PROMPT_SUFFIX = """
+### Question
+{question}
+
+### Answer
+[SQL]
+"""
+
+INSIGHTS_SYSTEM_PROMPT = """Based on the business question and data analysis results provided, give a comprehensive
+natural language answer with key insights.
+
+Provide a clear, business-focused answer that:
+1. Directly answers the question
+2. Highlights key findings and trends
+3. Provides actionable insights
+4. Mentions any data quality concerns if relevant
+"""
+
+BATCH_INSIGHTS_INSTRUCTIONS = """
+The user message is a JSON array of analyses, each with an "id", a "question" and a "data_summary". Answer every
+one of them and respond with a JSON object of the form {"insights": [{"id": <id>, "insight": "<answer>"}]}.
+"""
+
+class ConnectionPool:
+    """Fixed-size pool of reusable read connections to the SQLite database"""
+
+    PRAGMAS = (
+        "PRAGMA synchronous=normal",
+        "PRAGMA temp_store=memory",
+        "PRAGMA cache_size=-65536",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA query_only=1",
+    )
+
+    def __init__(self, db_path: str, size: int = DB_POOL_SIZE):
+        self.db_path = db_path
+        self.generation = 0
+        self.pool = queue.Queue()
+        self._enable_wal()
+        for _ in range(size):
+            self.pool.put((self.generation, self._connect()))
+
+    def _enable_wal(self):
+        # journal_mode is persisted in the file and needs a writable connection, so set it once here
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error enabling WAL mode: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, isolation_level=None)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the block"""
+        generation, conn = self.pool.get()
+        try:
+            if generation != self.generation:
+                conn.close()
+                generation, conn = self.generation, self._connect()
+            yield conn
+        finally:
+            self.pool.put((generation, conn))
+
+    def reset(self):
+        """Retire all connections, e.g. after the database file was recreated"""
+        self._enable_wal()
+        # Stale connections are swapped for fresh ones as they are next checked out
+        self.generation += 1
+
+class DraftSQLModel:
+    """Small local SQL model tried before escalating to the hosted LLM"""
+
+    def __init__(self, model_path: str = DRAFT_MODEL_PATH):
+        self.llm = None
+        self.prefix_ids = []
+        # llama.cpp contexts are not thread-safe
+        self.lock = threading.Lock()
+
+        if not model_path:
+            return
+        if Llama is None:
+            print("Draft model disabled: llama-cpp-python not installed")
+            return
+
+        try:
+            self.llm = Llama(model_path=model_path, n_ctx=DRAFT_MODEL_CONTEXT, verbose=False)
+        except Exception as e:
+            print(f"Error loading draft model: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.llm is not None
+
+    def set_prefix(self, prefix: str):
+        """Tokenize the static part of the prompt once instead of on every call"""
+        if self.enabled:
+            with self.lock:
+                self.prefix_ids = self.llm.tokenize(prefix.encode('utf-8'), add_bos=True)
+
+    def generate(self, question: str) -> Optional[str]:
+        """Draft SQL for the question, or return None if the model is busy with another request"""
+        suffix = DRAFT_PROMPT_SUFFIX.format(question=question)
+        # Waiting on a CPU-bound draft would be slower than going straight to the hosted LLM
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            # llama.cpp also reuses its KV cache for the shared token prefix
+            tokens = self.prefix_ids + self.llm.tokenize(suffix.encode('utf-8'), add_bos=False)
+            if len(tokens) + DRAFT_MAX_TOKENS > DRAFT_MODEL_CONTEXT:
+                raise ValueError("Draft prompt does not fit in the model context")
+            output = self.llm(tokens, max_tokens=DRAFT_MAX_TOKENS, temperature=0, stop=['[/SQL]'])
+        finally:
+            self.lock.release()
+        return output['choices'][0]['text'].strip()
+
+class RequestBatcher:
+    """Coalesce concurrent calls arriving within a short window into one batched call"""
+
+    def __init__(self, handler, max_batch: int = 16, max_wait_ms: int = 30, max_workers: int = 4,
+                 weight=None, max_weight: int = None):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        # Optional size budget per batch, e.g. prompt tokens; base_weight covers the shared prompt
+        self.weight = weight
+        self.max_weight = max_weight
+        self.base_weight = 0
+        self.queue = queue.Queue()
+        # Batches are dispatched on a pool so the collector keeps filling the next window
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.worker = threading.Thread(target=self._collect, daemon=True)
+        self.worker.start()
+
+    def submit(self, item: Any) -> Any:
+        """Enqueue an item and block until its batch has been processed"""
+        future = Future()
+        weight = self.weight(item) if self.weight else 0
+        self.queue.put((item, future, weight))
+        return future.result()
+
+    def _collect(self):
+        pending = None
+        while True:
+            batch = [pending or self.queue.get()]
+            pending = None
+            total_weight = self.base_weight + batch[0][2]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if self.max_weight and total_weight + entry[2] > self.max_weight:
+                    # Over budget: this entry opens the next batch instead
+                    pending = entry
+                    break
+                batch.append(entry)
+                total_weight += entry[2]
+            self.executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[tuple]):
+        try:
+            results = self.handler([item for item, _, _ in batch])
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+
+class LRUCache:
+    """Bounded exact-match cache with a JSON snapshot on disk"""
+
+    def __init__(self, maxsize: int = EXACT_CACHE_SIZE, snapshot_path: str = None):
+        self.maxsize = maxsize
+        self.snapshot_path = snapshot_path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Any:
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: str, value: Any):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def _load(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path) as f:
+                for key, value in json.load(f)[-self.maxsize:]:
+                    self.entries[key] = value
+        except Exception as e:
+            print(f"Error loading cache snapshot: {e}")
+
+    def save(self):
+        """Write the cache to disk, replacing any previous snapshot atomically"""
+        if not self.snapshot_path:
+            return
+        try:
+            with self.lock:
+                items = list(self.entries.items())
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(items, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Error saving cache snapshot: {e}")
+
+class OnnxEmbedder:
+    """Sentence embeddings from an INT8-quantized ONNX export of the embedding model"""
+
+    def __init__(self, model_path: str, max_length: int = 256):
+        self.session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        # optimum exports the tokenizer next to the model
+        self.tokenizer = Tokenizer.from_file(os.path.join(os.path.dirname(model_path), 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            'input_ids': np.array([e.ids for e in encodings], dtype='int64'),
+            'attention_mask': np.array([e.attention_mask for e in encodings], dtype='int64'),
+            'token_type_ids': np.array([e.type_ids for e in encodings], dtype='int64'),
+        }
+        token_embeddings = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+
+        # Mean-pool over real tokens, as sentence-transformers does for this model
+        mask = inputs['attention_mask'][..., None].astype('float32')
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+class SemanticCache:
+    """Cache LLM outputs keyed by question embedding, persisted in SQLite"""
+
+    NAMESPACES = ('sql', 'insights')
+
+    def __init__(self, cache_path: str, threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.cache_path = cache_path
+        self.threshold = threshold
+        self.schema_hash = None
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.model = None
+        self.backend = None
+        self.conn = None
+
+        if faiss is None:
+            print("Semantic cache disabled: faiss not installed")
+            return
+
+        try:
+            if ort is not None and os.path.exists(EMBEDDING_ONNX_PATH):
+                self.model = OnnxEmbedder(EMBEDDING_ONNX_PATH)
+                # The file name tells INT8 and FP32 exports apart
+                self.backend = f"onnx:{os.path.basename(EMBEDDING_ONNX_PATH)}"
+            else:
+                # Imported here so the ONNX path never pays for loading PyTorch
+                from sentence_transformers import SentenceTransformer
+                self.model = SentenceTransformer(EMBEDDING_MODEL)
+                self.backend = f"torch:{EMBEDDING_MODEL}"
+            self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    id INTEGER PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    schema_hash TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    sql_query TEXT,
+                    insights TEXT,
+                    result_digest TEXT,
+                    created_at TEXT
+                )
+            ''')
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(llm_cache)")}
+            if 'result_digest' not in columns:
+                # Insights stored before results were digested can never be matched, so drop them
+                self.conn.execute("ALTER TABLE llm_cache ADD COLUMN result_digest TEXT")
+                self.conn.execute("DELETE FROM llm_cache WHERE namespace = 'insights'")
+            self.conn.commit()
+        except ImportError:
+            print("Semantic cache disabled: no embedding backend installed")
+            self.model = None
+            self.conn = None
+        except Exception as e:
+            print(f"Error initializing semantic cache: {e}")
+            self.model = None
+            self.conn = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.model is not None and self.conn is not None
+
+    def set_schema_hash(self, schema_hash: str):
+        """Drop entries created against a different schema or embedding backend and rebuild the indexes"""
+        if not self.enabled:
+            return
+        # Vectors from different backends are not comparable, so the backend is part of the fingerprint
+        schema_hash = hashlib.sha1(f"{schema_hash}:{self.backend}".encode('utf-8')).hexdigest()
+        if schema_hash == self.schema_hash:
+            return
+
+        with self.lock:
+            self.conn.execute("DELETE FROM llm_cache WHERE schema_hash != ?", (schema_hash,))
+            self.conn.commit()
+            self.schema_hash = schema_hash
+
+            dim = self.model.get_sentence_embedding_dimension()
+            self.indexes = {ns: faiss.IndexIDMap(faiss.IndexFlatIP(dim)) for ns in self.NAMESPACES}
+            for namespace in self.NAMESPACES:
+                rows = self.conn.execute(
+                    "SELECT id, embedding FROM llm_cache WHERE namespace = ?", (namespace,)
+                ).fetchall()
+                if rows:
+                    ids = np.array([row[0] for row in rows], dtype='int64')
+                    vectors = np.vstack([np.frombuffer(row[1], dtype='float32') for row in rows])
+                    self.indexes[namespace].add_with_ids(vectors, ids)
+
+    @functools.lru_cache(maxsize=1024)
+    def _embed(self, text: str) -> np.ndarray:
+        # Normalized embeddings make inner product equal to cosine similarity
+        return self.model.encode([text], normalize_embeddings=True).astype('float32')
+
+    def search(self, namespace: str, question: str, sql_query: str = None) -> List[Dict[str, Any]]:
+        """Return cached entries above the similarity threshold, closest first"""
+        if not self.enabled:
+            return []
+
+        matches = []
+        try:
+            vector = self._embed(question)
+            with self.lock:
+                index = self.indexes.get(namespace)
+                if index is None or index.ntotal == 0:
+                    return []
+
+                # Insights are only reusable for the same SQL, so look past the top hit
+                k = 1 if sql_query is None else min(index.ntotal, 5)
+                scores, ids = index.search(vector, k)
+                for score, row_id in zip(scores[0], ids[0]):
+                    if row_id == -1 or score < self.threshold:
+                        break
+                    row = self.conn.execute(
+                        "SELECT question, sql_query, insights, result_digest FROM llm_cache WHERE id = ?",
+                        (int(row_id),)
+                    ).fetchone()
+                    if row and (sql_query is None or row[1] == sql_query):
+                        matches.append(
+                            {'question': row[0], 'sql_query': row[1], 'insights': row[2], 'result_digest': row[3]}
+                        )
+        except Exception as e:
+            print(f"Error reading semantic cache: {e}")
+        return matches
+
+    def lookup(self, namespace: str, question: str, sql_query: str = None,
+               result_digest: str = None) -> Dict[str, Any]:
+        """Return the closest cached entry above the similarity threshold, if any"""
+        # Insights additionally need the same results, not just the same SQL
+        for match in self.search(namespace, question, sql_query=sql_query):
+            if sql_query is None or match['result_digest'] == result_digest:
+                return match
+        return None
+
+    def store(self, namespace: str, question: str, sql_query: str, insights: str = None,
+              result_digest: str = None):
+        """Persist an LLM output and add its embedding to the namespace index"""
+        if not self.enabled:
+            return
+
+        try:
+            vector = self._embed(question)
+            with self.lock:
+                cursor = self.conn.execute(
+                    "INSERT INTO llm_cache "
+                    "(namespace, schema_hash, question, embedding, sql_query, insights, result_digest, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (namespace, self.schema_hash, question, vector.tobytes(), sql_query, insights, result_digest,
+                     datetime.now().isoformat())
+                )
+                self.conn.commit()
+                self.indexes[namespace].add_with_ids(vector, np.array([cursor.lastrowid], dtype='int64'))
+        except Exception as e:
+            print(f"Error writing semantic cache: {e}")
 
 class SQLAgent:
     def __init__(self):
         self.db_path = DATABASE_PATH
+        self.pool = ConnectionPool(self.db_path)
+        self.exact_cache = LRUCache(snapshot_path=EXACT_CACHE_PATH)
+        atexit.register(self.exact_cache.save)
+        self.result_cache = LRUCache(maxsize=RESULT_CACHE_SIZE)
+        # Single LLM requests that replace a failed batched call run side by side here
+        self.llm_executor = ThreadPoolExecutor(max_workers=MAX_BATCH_QUESTIONS)
+        self.cache = SemanticCache(CACHE_PATH)
+        self.draft_model = DraftSQLModel()
+        self.sql_batcher = RequestBatcher(
+            self._generate_sql_batch, max_batch=MAX_BATCH_QUESTIONS,
+            weight=count_tokens, max_weight=BATCH_MAX_PROMPT_TOKENS
+        )
+        self._schema_lock = threading.Lock()
+        self._load_schema(self._db_mtime())
+    
+    def _db_mtime(self) -> float:
+        try:
+            return os.path.getmtime(self.db_path)
+        except OSError:
+            return None
+    
+    def _data_version(self) -> tuple:
+        """Identify the database contents, including commits not yet checkpointed out of the WAL"""
+        version = []
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+    
+    def _load_schema(self, mtime: float):
+        """Analyze the schema and precompute everything derived from it"""
         self.schema_info = self._analyze_schema()
+        self.schema_hash = self._fingerprint_schema()
+        self._schema_prompt = self._format_schema_for_prompt()
+        self.sql_system_prompt = SQL_SYSTEM_PROMPT + self._schema_prompt
+        self.static_prompt_tokens = count_tokens(self.sql_system_prompt + BATCH_SQL_INSTRUCTIONS)
+        self.sql_batcher.base_weight = self.static_prompt_tokens
+        self.draft_model.set_prefix(DRAFT_PROMPT_PREFIX + self._schema_prompt)
+        self._schema_mtime = mtime
+        self.cache.set_schema_hash(self.schema_hash)
+    
+    def _refresh_schema(self):
+        """Reload the schema only when the database file has changed on disk"""
+        mtime = self._db_mtime()
+        if mtime == self._schema_mtime:
+            return
+        with self._schema_lock:
+            if mtime != self._schema_mtime:
+                self.pool.reset()
+                self._load_schema(mtime)
     
     def _analyze_schema(self) -> Dict[str, Any]:
         """Analyze database schema to understand structure"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get all tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            schema = {}
-            for table in tables:
-                # Get column information
-                cursor.execute(f"PRAGMA table_info({table})")
-                columns = cursor.fetchall()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 
-                # Get sample data
-                cursor.execute(f"SELECT * FROM {table} LIMIT 5")
-                sample_data = cursor.fetchall()
+                # Get all tables
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+                tables = [row[0] for row in cursor.fetchall()]
                 
-                schema[table] = {
-                    'columns': [{'name': col[1], 'type': col[2], 'nullable': not col[3]} for col in columns],
-                    'sample_data': sample_data[:3] if sample_data else []
-                }
+                schema = {}
+                for table in tables:
+                    # Get column information
+                    cursor.execute(f"PRAGMA table_info({table})")
+                    columns = cursor.fetchall()
+                    
+                    # Get sample data
+                    cursor.execute(f"SELECT * FROM {table} LIMIT 5")
+                    sample_data = cursor.fetchall()
+                    
+                    schema[table] = {
+                        'columns': [{'name': col[1], 'type': col[2], 'nullable': not col[3]} for col in columns],
+                        'sample_data': sample_data[:3] if sample_data else []
+                    }
             
-            conn.close()
             return schema
         except Exception as e:
             print(f"Error analyzing schema: {e}")
             return {}
     
+    def _fingerprint_schema(self) -> str:
+        """Hash the analyzed schema so cached LLM outputs can be invalidated"""
+        payload = json.dumps(self.schema_info, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def _sql_cache_key(self, question: str) -> str:
+        return LRUCache.make_key('sql', question.strip().lower(), self.schema_hash)
+    
     def generate_sql_query(self, question: str) -> str:
         """Generate SQL query from natural language question"""
-        schema_context = self._format_schema_for_prompt()
-        
-        prompt = f"""
-        You are an expert SQL analyst. Given the following database schema and a business question, 
-        generate an appropriate SQL query.
-        
-        Database Schema:
-        {schema_context}
-        
-        Business Question: {question}
+        self._refresh_schema()
+        exact_key = self._sql_cache_key(question)
+        cached_sql = self.exact_cache.get(exact_key)
+        if cached_sql:
+            return cached_sql
         
-        Important guidelines:
-        1. Handle cases where column names might be unclear or abbreviated
-        2. Use appropriate JOINs when data spans multiple tables
-        3. Apply proper filtering and aggregation
-        4. Consider data quality issues (nulls, duplicates, inconsistent formats)
-        5. Return only the SQL query, no explanations
+        cached = self.cache.lookup('sql', question)
+        if cached:
+            self.exact_cache.put(exact_key, cached['sql_query'])
+            return cached['sql_query']
         
-        SQL Query:
-        """
+        try:
+            # Generated SQL is cached by remember_sql once it has run successfully
+            return self._draft_sql(question) or self.sql_batcher.submit(question)
+        except Exception as e:
+            print(f"Error generating SQL: {e}")
+            return None
+    
+    def remember_sql(self, question: str, sql_query: str, query_results: Dict[str, Any]):
+        """Cache generated SQL for the question once it is known to execute"""
+        if not query_results['success']:
+            return
+        exact_key = self._sql_cache_key(question)
+        # Cache hits are already in the exact cache, so only new generations are stored
+        if self.exact_cache.get(exact_key) == sql_query:
+            return
+        self.exact_cache.put(exact_key, sql_query)
+        self.cache.store('sql', question, sql_query)
+    
+    def _draft_sql(self, question: str) -> str:
+        """Try the local draft model; return None so the caller escalates to the hosted LLM"""
+        if not self.draft_model.enabled:
+            return None
+        try:
+            draft = self.draft_model.generate(question)
+        except Exception as e:
+            print(f"Error generating draft SQL: {e}")
+            return None
+        return draft if draft and self._validate_sql(draft) else None
+    
+    def _validate_sql(self, sql_query: str) -> bool:
+        """Check that SQL is one complete statement SQLite can compile against the schema"""
+        statement = sql_query.strip().rstrip(';')
+        if not sqlite3.complete_statement(statement + ';') or check_read_only_sql(statement):
+            return False
+        try:
+            with self.pool.connection() as conn:
+                conn.execute(f"EXPLAIN {statement}")
+            return True
+        except (sqlite3.Error, sqlite3.Warning):
+            return False
+    
+    def _generate_sql(self, question: str) -> str:
+        """Generate SQL for a single question with one LLM call"""
+        response = self._chat(
+            self.sql_system_prompt, question, max_tokens=500, temperature=0.1, json_mode=True
+        )
+        return json.loads(self._clean_json(response))['sql'].strip()
+    
+    def _generate_sql_batch(self, questions: List[str]) -> List[str]:
+        """Generate SQL for several concurrent questions with a single LLM call"""
+        unique_questions = list(dict.fromkeys(questions))
+        if len(unique_questions) == 1:
+            sql_query = self._generate_sql(unique_questions[0])
+            return [sql_query] * len(questions)
         
+        generated = {}
         try:
-            response = openai.Completion.create(
-                engine="text-davinci-003",
-                prompt=prompt,
-                max_tokens=500,
-                temperature=0.1,
-                stop=["\\n\\n"]
+            payload = json.dumps([{'id': i, 'question': q} for i, q in enumerate(unique_questions)])
+            response = self._chat(
+                self.sql_system_prompt + BATCH_SQL_INSTRUCTIONS, payload,
+                max_tokens=min(500 * len(unique_questions), MAX_OUTPUT_TOKENS), temperature=0.1, json_mode=True
             )
-            
-            sql_query = response.choices[0].text.strip()
-            return sql_query
+            for item in json.loads(self._clean_json(response))['queries']:
+                generated[unique_questions[int(item['id'])]] = item['sql'].strip()
+        except Exception as e:
+            print(f"Error generating batched SQL, falling back to single requests: {e}")
+        
+        missing = [question for question in unique_questions if not generated.get(question)]
+        generated.update(zip(missing, self.llm_executor.map(self._generate_sql_or_none, missing)))
+        return [generated[question] for question in questions]
+    
+    def _generate_sql_or_none(self, question: str) -> str:
+        try:
+            return self._generate_sql(question)
         except Exception as e:
             print(f"Error generating SQL: {e}")
             return None
     
     def execute_query(self, sql_query: str) -> Dict[str, Any]:
-        """Execute SQL query and return results"""
+        """Execute SQL query and return results, reusing them until the database changes"""
+        # Only validated, successful results are cached, so hits can skip validation
+        cache_key = LRUCache.make_key(normalize_sql(sql_query), self._data_version())
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        error = check_read_only_sql(sql_query)
+        if error:
+            return self._error_result(error)
+        
+        results = self._run_query(sql_query)
+        # Large result sets are not worth the memory of keeping around
+        if results['success'] and results['row_count'] <= RESULT_CACHE_MAX_ROWS:
+            self.result_cache.put(cache_key, results)
+        return results
+    
+    def _run_query(self, sql_query: str) -> Dict[str, Any]:
+        """Run SQL query against a pooled connection"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(sql_query, conn)
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.execute(sql_query)
+                columns = [col[0] for col in cursor.description] if cursor.description else []
+                rows = cursor.fetchall()
             
             return {
                 'success': True,
-                'data': df.to_dict('records'),
-                'columns': df.columns.tolist(),
-                'row_count': len(df)
+                'data': [dict(zip(columns, row)) for row in rows],
+                'columns': columns,
+                'row_count': len(rows)
             }
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-                'data': [],
-                'columns': [],
-                'row_count': 0
-            }
+            return self._error_result(str(e))
     
-    def generate_insights(self, question: str, query_results: Dict[str, Any]) -> str:
+    @staticmethod
+    def _error_result(message: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': message,
+            'data': [],
+            'columns': [],
+            'row_count': 0
+        }
+    
+    def generate_insights(self, question: str, sql_query: str, query_results: Dict[str, Any],
+                          candidates: List[Dict[str, Any]] = None) -> str:
         """Generate natural language insights from query results"""
+        return ''.join(self.stream_insights(question, sql_query, query_results, candidates)).strip()
+    
+    def stream_insights(self, question: str, sql_query: str, query_results: Dict[str, Any],
+                        candidates: List[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yield natural language insights incrementally as the LLM produces them"""
         if not query_results['success']:
-            return "I encountered an error while analyzing the data. Please try rephrasing your question."
+            yield "I encountered an error while analyzing the data. Please try rephrasing your question."
+            return
+        
+        exact_key = self._insights_key(question, sql_query, query_results)
+        result_digest = self._result_digest(query_results)
+        cached_insights = self._cached_insights(exact_key, question, sql_query, result_digest, candidates)
+        if cached_insights:
+            yield cached_insights
+            return
         
         data_summary = self._summarize_data(query_results['data'])
         
-        prompt = f"""
-        Based on the following business question and data analysis results, provide a comprehensive 
-        natural language answer with key insights.
+        user_prompt = f"Question: {question}\n\nData Summary:\n{data_summary}"
         
-        Question: {question}
+        parts = []
+        try:
+            for delta in self._chat_stream(INSIGHTS_SYSTEM_PROMPT, user_prompt, max_tokens=INSIGHTS_MAX_TOKENS, temperature=0.3):
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            print(f"Error generating insights: {e}")
+            if not parts:
+                yield f"Analysis completed, but I couldn't generate detailed insights. Raw results: {len(query_results['data'])} records found."
+            return
         
-        Data Summary:
-        {data_summary}
+        insights = ''.join(parts).strip()
+        if insights:
+            self.exact_cache.put(exact_key, insights)
+            self.cache.store('insights', question, sql_query, insights, result_digest=result_digest)
+    
+    def generate_insights_batch(self, items: List[tuple]) -> List[str]:
+        """Generate insights for several (question, sql_query, query_results) items with as few LLM calls as possible"""
+        insights = [None] * len(items)
+        # Repeated items are answered once, like repeated questions in _generate_sql_batch
+        duplicates = OrderedDict()
+        for i, (question, sql_query, query_results) in enumerate(items):
+            if not query_results['success']:
+                insights[i] = "I encountered an error while analyzing the data. Please try rephrasing your question."
+                continue
+            exact_key = self._insights_key(question, sql_query, query_results)
+            if exact_key in duplicates:
+                duplicates[exact_key].append(i)
+                continue
+            result_digest = self._result_digest(query_results)
+            insights[i] = self._cached_insights(exact_key, question, sql_query, result_digest)
+            if not insights[i]:
+                duplicates[exact_key] = [i]
+        pending = [indices[0] for indices in duplicates.values()]
         
-        Provide a clear, business-focused answer that:
-        1. Directly answers the question
-        2. Highlights key findings and trends
-        3. Provides actionable insights
-        4. Mentions any data quality concerns if relevant
+        if len(pending) > 1:
+            # Split evenly into as few calls as the providers' output limit allows
+            num_chunks = -(-len(pending) * INSIGHTS_MAX_TOKENS // MAX_OUTPUT_TOKENS)
+            chunks = [pending[start::num_chunks] for start in range(num_chunks)]
+            for chunk, answers in zip(chunks, self.llm_executor.map(
+                    lambda chunk: self._generate_insights_chunk([items[i] for i in chunk]), chunks)):
+                for i, answer in zip(chunk, answers):
+                    insights[i] = answer
         
-        Answer:
-        """
+        # Anything the batched answers missed gets its own request, all in parallel
+        missing = [i for i in pending if not insights[i]]
+        for i, answer in zip(missing, self.llm_executor.map(lambda i: self.generate_insights(*items[i]), missing)):
+            insights[i] = answer
         
+        for first, *rest in duplicates.values():
+            for i in rest:
+                insights[i] = insights[first]
+        return insights
+    
+    def _generate_insights_chunk(self, items: List[tuple]) -> List[str]:
+        """Answer several (question, sql_query, query_results) items with one LLM call; None marks a missed item"""
         try:
-            response = openai.Completion.create(
-                engine="text-davinci-003",
-                prompt=prompt,
-                max_tokens=800,
-                temperature=0.3
+            payload = json.dumps([
+                {'id': i, 'question': question, 'data_summary': self._summarize_data(query_results['data'])}
+                for i, (question, _, query_results) in enumerate(items)
+            ])
+            response = self._chat(
+                INSIGHTS_SYSTEM_PROMPT + BATCH_INSIGHTS_INSTRUCTIONS, payload,
+                max_tokens=INSIGHTS_MAX_TOKENS * len(items), temperature=0.3, json_mode=True
             )
-            
-            return response.choices[0].text.strip()
+            answers = {int(item['id']): item['insight'].strip()
+                       for item in json.loads(self._clean_json(response))['insights']}
+        except Exception as e:
+            print(f"Error generating batched insights, falling back to single requests: {e}")
+            return [None] * len(items)
+        
+        insights = [answers.get(i) or None for i in range(len(items))]
+        for (question, sql_query, query_results), insight in zip(items, insights):
+            if insight:
+                self.exact_cache.put(self._insights_key(question, sql_query, query_results), insight)
+                self.cache.store('insights', question, sql_query, insight,
+                                 result_digest=self._result_digest(query_results))
+        return insights
+    
+    def prefetch_insights(self, question: str, sql_query: str) -> List[Dict[str, Any]]:
+        """Search the semantic cache for a query's insights before its results are known"""
+        return self.cache.search('insights', question, sql_query=sql_query)
+    
+    def _cached_insights(self, exact_key: str, question: str, sql_query: str, result_digest: str,
+                         candidates: List[Dict[str, Any]] = None) -> str:
+        """Look up insights in the exact-match cache, then the semantic cache or prefetched candidates"""
+        cached_insights = self.exact_cache.get(exact_key)
+        if cached_insights:
+            return cached_insights
+        
+        if candidates is None:
+            cached = self.cache.lookup('insights', question, sql_query=sql_query, result_digest=result_digest)
+        else:
+            cached = next((c for c in candidates if c['result_digest'] == result_digest), None)
+        if cached:
+            self.exact_cache.put(exact_key, cached['insights'])
+            return cached['insights']
+        return None
+    
+    def _chat(self, system_prompt: str, user_prompt: str, max_tokens: int, temperature: float,
+              json_mode: bool = False) -> str:
+        """Send a chat request with the static system prompt first so providers can cache the prefix"""
+        try:
+            if openai_client is None:
+                raise RuntimeError("OPENAI_API_KEY is not set")
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {'role': 'system', 'content': system_prompt},
+                    {'role': 'user', 'content': user_prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                response_format={'type': 'json_object'} if json_mode else {'type': 'text'}
+            )
+            return response.choices[0].message.content.strip()
         except Exception as e:
-            return f"Analysis completed, but I couldn't generate detailed insights. Raw results: {len(query_results['data'])} records found."
+            if anthropic_client is None:
+                raise
+            print(f"OpenAI request failed, falling back to Anthropic: {e}")
+        
+        response = anthropic_client.messages.create(
+            model=ANTHROPIC_MODEL,
+            system=[{'type': 'text', 'text': system_prompt, 'cache_control': {'type': 'ephemeral'}}],
+            messages=[{'role': 'user', 'content': user_prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.content[0].text.strip()
+    
+    def _chat_stream(self, system_prompt: str, user_prompt: str, max_tokens: int, temperature: float) -> Iterator[str]:
+        """Like _chat, but yield text deltas as soon as the provider sends them"""
+        try:
+            if openai_client is None:
+                raise RuntimeError("OPENAI_API_KEY is not set")
+            stream = openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {'role': 'system', 'content': system_prompt},
+                    {'role': 'user', 'content': user_prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+        except Exception as e:
+            if anthropic_client is None:
+                raise
+            print(f"OpenAI request failed, falling back to Anthropic: {e}")
+            with anthropic_client.messages.stream(
+                model=ANTHROPIC_MODEL,
+                system=[{'type': 'text', 'text': system_prompt, 'cache_control': {'type': 'ephemeral'}}],
+                messages=[{'role': 'user', 'content': user_prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature
+            ) as anthropic_stream:
+                yield from anthropic_stream.text_stream
+            return
+        
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    @staticmethod
+    def _clean_json(text: str) -> str:
+        """Strip markdown code fences around JSON answers from the Anthropic fallback"""
+        return _JSON_FENCE_RE.sub('', text.strip()).strip()
+    
+    @staticmethod
+    def _result_digest(query_results: Dict[str, Any]) -> str:
+        """Fingerprint a result set by its size and first row so insights track data changes"""
+        data = query_results['data']
+        first_row_digest = LRUCache.make_key(data[0]) if data else None
+        return LRUCache.make_key(query_results['row_count'], first_row_digest)
+    
+    def _insights_key(self, question: str, sql_query: str, query_results: Dict[str, Any]) -> str:
+        """Key insights on the question plus the shape of the result set"""
+        return LRUCache.make_key(
+            'insights', question.strip().lower(), sql_query,
+            sorted(query_results['columns']), self._result_digest(query_results)
+        )
     
     def _format_schema_for_prompt(self) -> str:
         """Format schema information for AI prompt"""
-        schema_text = ""
+        parts = []
         for table, info in self.schema_info.items():
-            schema_text += f"\\nTable: {table}\\n"
+            parts.append(f"\nTable: {table}\n")
             for col in info['columns']:
-                schema_text += f"  - {col['name']} ({col['type']})\\n"
+                parts.append(f"  - {col['name']} ({col['type']})\n")
             if info['sample_data']:
-                schema_text += f"  Sample data: {info['sample_data'][0]}\\n"
-        return schema_text
+                parts.append(f"  Sample data: {info['sample_data'][0]}\n")
+        return "".join(parts)
     
     def _summarize_data(self, data: List[Dict]) -> str:
         """Create a summary of query results for AI analysis"""
         if not data:
             return "No data returned"
         
-        summary = f"Dataset contains {len(data)} records\\n"
+        parts = [f"Dataset contains {len(data)} records\n"]
         
         # Get column info
-        if data:
-            columns = list(data[0].keys())
-            summary += f"Columns: {', '.join(columns)}\\n"
+        columns = list(data[0].keys())
+        parts.append(f"Columns: {', '.join(columns)}\n")
+        
+        # Basic statistics for numeric columns, skipping pandas when there are none
+        has_numbers = any(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for row in data for value in row.values()
+        )
+        if has_numbers:
+            # pandas is only needed here, so it is imported on first use rather than at startup
+            if not hasattr(self, '_pd'):
+                import pandas as pd
+                self._pd = pd
             
-            # Basic statistics for numeric columns
-            df = pd.DataFrame(data)
-            numeric_cols = df.select_dtypes(include=['number']).columns
+            # Stats only feed the prompt, so a random sample is enough for large results
+            sample = random.sample(data, SUMMARY_SAMPLE_SIZE) if len(data) > SUMMARY_SAMPLE_SIZE else data
+            df = self._pd.DataFrame(sample)
+            numeric_cols = df.select_dtypes(include=['number']).columns[:3]  # Limit to first 3 numeric columns
             if len(numeric_cols) > 0:
-                summary += "\\nNumeric summaries:\\n"
-                for col in numeric_cols[:3]:  # Limit to first 3 numeric columns
-                    summary += f"{col}: min={df[col].min()}, max={df[col].max()}, avg={df[col].mean():.2f}\\n"
+                stats = df[numeric_cols].agg(['min', 'max', 'mean']).to_dict()
+                parts.append("\nNumeric summaries:\n")
+                for col, col_stats in stats.items():
+                    parts.append(f"{col}: min={col_stats['min']}, max={col_stats['max']}, avg={col_stats['mean']:.2f}\n")
         
-        return summary
+        return "".join(parts)
 
 # Initialize agent
 sql_agent = SQLAgent()
+executor = ThreadPoolExecutor(max_workers=8)
+# SQL generation waits on the LLM, so batch questions get their own pool wide enough to reach the batcher together
+generation_executor = ThreadPoolExecutor(max_workers=MAX_BATCH_QUESTIONS)
+
+def _sse(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload, default=str)}\n\n"
+
+def stream_answer(question: str, sql_query: str, results: Dict[str, Any],
+                  candidates: List[Dict[str, Any]] = None) -> Iterator[str]:
+    """Send the query results as the first event, then insight text as it is generated"""
+    yield _sse({
+        'type': 'result',
+        'question': question,
+        'sql_query': sql_query,
+        'results': results,
+        'timestamp': datetime.now().isoformat()
+    })
+    
+    parts = []
+    for delta in sql_agent.stream_insights(question, sql_query, results, candidates):
+        parts.append(delta)
+        yield _sse({'type': 'delta', 'delta': delta})
+    
+    yield _sse({'type': 'done', 'insights': ''.join(parts).strip()})
 
 @app.route('/api/ask', methods=['POST'])
 def ask_question():
@@ -204,11 +1100,22 @@ def ask_question():
         if not sql_query:
             return jsonify({'error': 'Could not generate SQL query'}), 500
         
-        # Execute query
-        results = sql_agent.execute_query(sql_query)
+        # Execute query on the shared pool while the semantic cache is searched for matching insights
+        results_future = executor.submit(sql_agent.execute_query, sql_query)
+        candidates = sql_agent.prefetch_insights(question, sql_query)
+        results = results_future.result()
+        sql_agent.remember_sql(question, sql_query, results)
+        
+        # Stream insights to clients that accept Server-Sent Events
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            return Response(
+                stream_with_context(stream_answer(question, sql_query, results, candidates)),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
         
         # Generate insights
-        insights = sql_agent.generate_insights(question, results)
+        insights = sql_agent.generate_insights(question, sql_query, results, candidates)
         
         return jsonify({
             'question': question,
@@ -221,8 +1128,49 @@ def ask_question():
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/api/ask_batch', methods=['POST'])
+def ask_batch():
+    try:
+        data = request.get_json()
+        questions = data.get('questions', [])
+        
+        if not isinstance(questions, list) or not questions or not all(isinstance(q, str) and q.strip() for q in questions):
+            return jsonify({'error': 'A non-empty list of questions is required'}), 400
+        if len(questions) > MAX_BATCH_QUESTIONS:
+            return jsonify({'error': f'At most {MAX_BATCH_QUESTIONS} questions can be asked at once'}), 400
+        
+        # Concurrent SQL generation is coalesced by the batcher, then queries run in parallel
+        sql_queries = list(generation_executor.map(sql_agent.generate_sql_query, questions))
+        answered = [i for i, sql_query in enumerate(sql_queries) if sql_query]
+        results = dict(zip(answered, executor.map(sql_agent.execute_query, [sql_queries[i] for i in answered])))
+        for i in answered:
+            sql_agent.remember_sql(questions[i], sql_queries[i], results[i])
+        
+        # One LLM call covers the insights for every result set
+        insights = dict(zip(answered, sql_agent.generate_insights_batch(
+            [(questions[i], sql_queries[i], results[i]) for i in answered]
+        )))
+        
+        answers = []
+        for i, question in enumerate(questions):
+            if i not in results:
+                answers.append({'question': question, 'error': 'Could not generate SQL query'})
+                continue
+            answers.append({
+                'question': question,
+                'sql_query': sql_queries[i],
+                'results': results[i],
+                'insights': insights[i]
+            })
+        
+        return jsonify({'answers': answers, 'timestamp': datetime.now().isoformat()})
+    
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
 @app.route('/api/schema', methods=['GET'])
 def get_schema():
+    sql_agent._refresh_schema()
     return jsonify(sql_agent.schema_info)
 
 @app.route('/api/health', methods=['GET'])
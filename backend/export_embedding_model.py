@@ -0,0 +1,30 @@
+import os
+import subprocess
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+def export_embedding_model():
+    """Export the semantic cache embedding model to ONNX and quantize it to INT8"""
+    
+    output_dir = os.path.join(os.path.dirname(__file__), 'onnx_model')
+    
+    # Export with optimum; this also writes tokenizer.json next to the model
+    subprocess.run([
+        'optimum-cli', 'export', 'onnx',
+        '--model', EMBEDDING_MODEL,
+        '--task', 'feature-extraction',
+        output_dir
+    ], check=True)
+    
+    # Dynamic INT8 quantization of the weights for faster CPU inference
+    quantize_dynamic(
+        os.path.join(output_dir, 'model.onnx'),
+        os.path.join(output_dir, 'model_quantized.onnx'),
+        weight_type=QuantType.QInt8
+    )
+    
+    print(f"Quantized embedding model written to: {os.path.join(output_dir, 'model_quantized.onnx')}")
+
+if __name__ == '__main__':
+    export_embedding_model()
@@ -0,0 +1,17 @@
+import os
+
+# Requests spend most of their time waiting on LLM APIs, but SQLite, embedding,
+# FAISS, pandas and the draft model are blocking C calls, so use real threads
+# rather than greenlets that would stall the whole worker on each of them
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# Streamed insights can keep a response open longer than the 30s default
+timeout = 120
+
+# Don't preload: the app starts background threads, which don't survive forking.
+# Each worker therefore loads its own embedding model, plus its own GGUF draft
+# model when DRAFT_MODEL_PATH is set, so size WEB_CONCURRENCY to the available memory
+preload_app = False
@@ -1,8 +1,6 @@
 import sqlite3
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
 import os
 
 def create_sample_database():
@@ -80,23 +78,44 @@ def create_sample_database():
     
     # Generate sample data with quality issues
     
+    # Bulk load in one explicit transaction; durability doesn't matter for a throwaway seed database
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.isolation_level = None
+    conn.execute('BEGIN')
+    
+    # Draw every column as a NumPy array in one call instead of one RNG call per row
+    rng = np.random.default_rng()
+    today = pd.Timestamp.now().normalize()
+    
+    def days_ago(offsets):
+        return (today - pd.to_timedelta(offsets, unit='D')).strftime('%Y-%m-%d').tolist()
+    
     # Customer data
     customer_names = ['John Smith', 'Jane Doe', 'Bob Johnson', 'Alice Wilson', 'Charlie Brown', 
                      'Diana Prince', 'Eve Adams', 'Frank Miller', 'Grace Lee', 'Henry Ford']
     segments = ['Premium', 'Standard', 'Basic', 'VIP', 'Regular']
     statuses = ['Active', 'Inactive', 'Suspended', 'New', None]  # Include null values
     
-    customers = []
-    for i in range(1, 101):
-        name = random.choice(customer_names) + f" {i}"
-        email = f"customer{i}@email.com" if random.random() > 0.1 else None  # 10% missing emails
-        phone = f"555-{random.randint(1000,9999)}" if random.random() > 0.15 else ""  # Some empty phones
-        address = f"{random.randint(100,9999)} Main St, City {i}"
-        reg_date = datetime.now() - timedelta(days=random.randint(1, 1000))
-        segment = random.choice(segments)
-        status = random.choice(statuses)
-        
-        customers.append((i, name, email, phone, address, reg_date.date(), segment, status))
+    n_customers = 100
+    customer_ids = np.arange(1, n_customers + 1).tolist()
+    names = rng.choice(customer_names, size=n_customers).tolist()
+    has_email = (rng.random(n_customers) > 0.1).tolist()  # 10% missing emails
+    has_phone = (rng.random(n_customers) > 0.15).tolist()  # Some empty phones
+    phone_numbers = rng.integers(1000, 10000, n_customers).tolist()
+    street_numbers = rng.integers(100, 10000, n_customers).tolist()
+    status_idx = rng.integers(0, len(statuses), n_customers).tolist()
+    
+    customers = zip(
+        customer_ids,
+        (f"{name} {i}" for name, i in zip(names, customer_ids)),
+        (f"customer{i}@email.com" if ok else None for i, ok in zip(customer_ids, has_email)),
+        (f"555-{num}" if ok else "" for num, ok in zip(phone_numbers, has_phone)),
+        (f"{num} Main St, City {i}" for num, i in zip(street_numbers, customer_ids)),
+        days_ago(rng.integers(1, 1001, n_customers)),
+        rng.choice(segments, size=n_customers).tolist(),
+        (statuses[k] for k in status_idx)
+    )
     
     cursor.executemany('INSERT INTO cust_tbl VALUES (?,?,?,?,?,?,?,?)', customers)
     
@@ -109,17 +128,24 @@ def create_sample_database():
                     'Books': ['Fiction', 'Non-Fiction', 'Educational']}
     suppliers = ['SupplierA', 'SupplierB', 'SupplierC', 'SupplierD']
     
-    products = []
-    for i in range(1, 51):
-        cat = random.choice(categories)
-        subcat = random.choice(subcategories[cat])
-        price = round(random.uniform(10, 500), 2)
-        cost = round(price * random.uniform(0.4, 0.8), 2)
-        supplier = random.choice(suppliers)
-        launch_date = datetime.now() - timedelta(days=random.randint(30, 365))
-        stock = random.randint(0, 100)
-        
-        products.append((i, f"Product {i}", cat, subcat, price, cost, supplier, launch_date.date(), stock))
+    n_products = 50
+    product_ids = np.arange(1, n_products + 1).tolist()
+    product_cats = rng.choice(categories, size=n_products).tolist()
+    subcat_draws = rng.random(n_products).tolist()
+    prices = np.round(rng.uniform(10, 500, n_products), 2)
+    costs = np.round(prices * rng.uniform(0.4, 0.8, n_products), 2)
+    
+    products = zip(
+        product_ids,
+        (f"Product {i}" for i in product_ids),
+        product_cats,
+        (subcategories[cat][int(r * len(subcategories[cat]))] for cat, r in zip(product_cats, subcat_draws)),
+        prices.tolist(),
+        costs.tolist(),
+        rng.choice(suppliers, size=n_products).tolist(),
+        days_ago(rng.integers(30, 366, n_products)),
+        rng.integers(0, 101, n_products).tolist()
+    )
     
     cursor.executemany('INSERT INTO prod_master VALUES (?,?,?,?,?,?,?,?,?)', products)
     
@@ -127,45 +153,45 @@ def create_sample_database():
     regions = ['North', 'South', 'East', 'West', 'Central']
     sales_reps = ['Alice Rep', 'Bob Rep', 'Charlie Rep', 'Diana Rep', 'Eve Rep']
     
-    orders = []
-    for i in range(1, 501):
-        customer_id = random.randint(1, 100)
-        product_id = random.randint(1, 50)
-        order_date = datetime.now() - timedelta(days=random.randint(1, 365))
-        qty = random.randint(1, 10)
-        
-        # Get product price (with some price variations)
-        cursor.execute('SELECT price FROM prod_master WHERE pid = ?', (product_id,))
-        base_price = cursor.fetchone()[0]
-        unit_price = base_price * random.uniform(0.9, 1.1)  # Price variations
-        
-        discount = random.uniform(0, 0.3) if random.random() > 0.7 else 0
-        rep = random.choice(sales_reps)
-        region = random.choice(regions)
-        
-        orders.append((i, customer_id, product_id, order_date.date(), qty, round(unit_price, 2), 
-                      round(discount * 100, 1), rep, region))
+    # Index product prices by pid so unit prices are a single vectorized lookup
+    price_array = np.concatenate(([0.0], prices))
+    
+    n_orders = 500
+    order_products = rng.integers(1, n_products + 1, n_orders)
+    unit_prices = np.round(price_array[order_products] * rng.uniform(0.9, 1.1, n_orders), 2)  # Price variations
+    discounts = np.where(rng.random(n_orders) > 0.7, np.round(rng.uniform(0, 0.3, n_orders) * 100, 1), 0)
+    
+    orders = zip(
+        np.arange(1, n_orders + 1).tolist(),
+        rng.integers(1, n_customers + 1, n_orders).tolist(),
+        order_products.tolist(),
+        days_ago(rng.integers(1, 366, n_orders)),
+        rng.integers(1, 11, n_orders).tolist(),
+        unit_prices.tolist(),
+        discounts.tolist(),
+        rng.choice(sales_reps, size=n_orders).tolist(),
+        rng.choice(regions, size=n_orders).tolist()
+    )
     
     cursor.executemany('INSERT INTO OrderData VALUES (?,?,?,?,?,?,?,?,?)', orders)
     
     # Financial data
-    start_date = datetime(2022, 1, 1)
-    financial_data = []
-    
-    for i in range(24):  # 24 months of data
-        period = start_date + timedelta(days=30*i)
-        revenue = random.uniform(100000, 500000)
-        cogs = revenue * random.uniform(0.4, 0.6)
-        opex = revenue * random.uniform(0.15, 0.25)
-        marketing = revenue * random.uniform(0.05, 0.15)
-        misc = revenue * random.uniform(0.01, 0.05)
-        
-        financial_data.append((i+1, period.date(), round(revenue, 2), round(cogs, 2), 
-                             round(opex, 2), round(marketing, 2), round(misc, 2)))
+    n_periods = 24  # 24 months of data
+    revenue = rng.uniform(100000, 500000, n_periods)
+    
+    financial_data = zip(
+        np.arange(1, n_periods + 1).tolist(),
+        pd.date_range('2022-01-01', periods=n_periods, freq='30D').strftime('%Y-%m-%d').tolist(),
+        np.round(revenue, 2).tolist(),
+        np.round(revenue * rng.uniform(0.4, 0.6, n_periods), 2).tolist(),
+        np.round(revenue * rng.uniform(0.15, 0.25, n_periods), 2).tolist(),
+        np.round(revenue * rng.uniform(0.05, 0.15, n_periods), 2).tolist(),
+        np.round(revenue * rng.uniform(0.01, 0.05, n_periods), 2).tolist()
+    )
     
     cursor.executemany('INSERT INTO fin_data VALUES (?,?,?,?,?,?,?)', financial_data)
     
-    conn.commit()
+    conn.execute('COMMIT')
     conn.close()
     
     print(f"Sample database created at: {db_path}")
@@ -106,10 +106,40 @@ const App: React.FC = () => {
     setResult(null);
 
     try {
-      const response = await axios.post(`${API_BASE}/ask`, { question });
-      setResult(response.data);
+      const response = await fetch(`${API_BASE}/ask`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+        body: JSON.stringify({ question }),
+      });
+      if (!response.ok || !response.body) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.error || 'An error occurred');
+      }
+
+      // Query results arrive first, then the insights stream in as they are generated
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() || '';
+        for (const event of events) {
+          if (!event.startsWith('data: ')) continue;
+          const payload = JSON.parse(event.slice(6));
+          if (payload.type === 'result') {
+            setResult({ ...payload, insights: '' });
+          } else if (payload.type === 'delta') {
+            setResult(prev => prev && { ...prev, insights: prev.insights + payload.delta });
+          } else if (payload.type === 'done') {
+            setResult(prev => prev && { ...prev, insights: payload.insights });
+          }
+        }
+      }
     } catch (err: any) {
-      setError(err.response?.data?.error || 'An error occurred');
+      setError(err.message || 'An error occurred');
     } finally {
       setLoading(false);
     }